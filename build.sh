@@ -1,4 +1,4 @@
-PYTHON="python"
+PYTHON="${PYTHON:-python}"
 COMPILER="cosmos.py"
 CC="gcc"
 
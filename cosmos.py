@@ -10,8 +10,8 @@ def main():
 
     if len(sys.argv) != 2:
         sys.exit('Error: Compiler needs source file as an argument')
-    with open(sys.argv[1], 'r') as inputFile:
-        source = inputFile.read()
+    with open(sys.argv[1], 'rb') as inputFile:
+        source = inputFile.read() # Lexed as bytes; token text is decoded as it is materialized.
 
     # Initialize lexer, emitter and parser
     lexer = Lexer(source=source)
@@ -1,20 +1,41 @@
+import os
+
+
+WRITE_BLOCK_SIZE = 1 << 19 # Bytes handed to each os.write call.
+
+
 # Emitter object keeps track of the generated code and outputs it.
 class Emitter:
+    __slots__ = ('full_path', 'header_parts', 'code_parts')
+
     def __init__(self, full_path) -> None:
         self.full_path = full_path
-        self.header = ''
-        self.code = ''
+        self.header_parts = [] # Pieces of the header, joined once when the file is written.
+        self.code_parts = [] # Pieces of the code, joined once when the file is written.
 
     def emit(self, code) -> None:
-        self.code += code
+        self.code_parts.append(code)
 
     def emit_line(self, code) -> None:
-        self.code += code + '\n'
+        self.code_parts.append(code)
+        self.code_parts.append('\n')
+
+    # Emit several pieces of code in a row without joining them first.
+    def emit_many(self, *parts) -> None:
+        self.code_parts.extend(parts)
 
     def header_line(self, code) -> None:
-        self.header += code + '\n'
+        self.header_parts.append(code)
+        self.header_parts.append('\n')
 
     def writeFile(self):
-        with open(self.full_path, 'w') as output_file:
-            output_file.write(self.header + self.code)
-    
\ No newline at end of file
+        # The output is plain C source, so encode it once and write the bytes straight to the file descriptor,
+        # in large blocks, skipping the text layer's encoding and newline translation.
+        data = memoryview((''.join(self.header_parts) + ''.join(self.code_parts)).encode('utf-8'))
+        fd = os.open(self.full_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while data:
+                written = os.write(fd, data[:WRITE_BLOCK_SIZE])
+                data = data[written:]
+        finally:
+            os.close(fd)
@@ -1,8 +1,9 @@
 import sys
 import enum
+import re
 
 
-class TokenType(enum.Enum):
+class TokenType(enum.IntEnum):
     EOF = -1
     NEWLINE = 0
     NUMBER = 1
@@ -34,147 +35,119 @@ class TokenType(enum.Enum):
     GTEQ = 211
 
 
+# Keyword text -> kind, built once. Relies on all keyword enum values being 1XX.
+KEYWORDS = {kind.name: kind for kind in TokenType if 100 <= kind.value <= 200}
+
+# Operator text -> kind.
+OPERATORS = {
+    '=': TokenType.EQ,
+    '+': TokenType.PLUS,
+    '-': TokenType.MINUS,
+    '*': TokenType.ASTERISK,
+    '/': TokenType.SLASH,
+    '==': TokenType.EQEQ,
+    '!=': TokenType.NOTEQ,
+    '<': TokenType.LT,
+    '<=': TokenType.LTEQ,
+    '>': TokenType.GT,
+    '>=': TokenType.GTEQ,
+}
+
+# Token bytes -> (text, kind) for every token whose kind follows from its text alone: newlines, operators and keywords.
+FIXED_TOKENS = {text.encode('ascii'): (sys.intern(text), kind) for text, kind in {'\n': TokenType.NEWLINE, **OPERATORS, **KEYWORDS}.items()}
+
+# One alternative per kind of token over the source bytes, each taking any leading whitespace and comment
+# along with it so that every match is a token. Common tokens come first; an error alternative only has to
+# follow the valid one it overlaps with. Every byte has to match some alternative, otherwise finditer
+# would silently skip it, hence the trailing UNKNOWN catch-all (which keeps a UTF-8 sequence together).
+# There are no CRs to handle: Lexer turns every line ending into '\n' before scanning.
+TOKEN_RE = re.compile(rb'''
+    [ \t]* (?:\#[^\n]*)?                     # Skip whitespace and comments, except newlines.
+    (?:
+      (?P<IDENT>[A-Za-z][A-Za-z0-9]*)
+    | (?P<OP>==|!=|<=|>=|[+\-*/=<>])
+    | (?P<BADNUMBER>[0-9]+\.(?![0-9]))       # Must have at least one digit after decimal.
+    | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?)
+    | (?P<NEWLINE>\n)
+    | (?P<STRING>"[^"\t\\%]*")
+    | (?P<BADSTRING>"[^"\t\\%]*[\t\\%])      # Illegal character before the closing quote.
+    | (?P<OPENSTRING>")                      # Closing quote never reached.
+    | (?P<BADOP>!)
+    | (?P<UNKNOWN>[\xc0-\xff][\x80-\xbf]*|.)
+    )
+''', re.VERBOSE)
+
+
 class Token:
+    __slots__ = ('text', 'kind')
+
     def __init__(self, token_text, token_kind) -> None:
         self.text = token_text
         self.kind = token_kind
 
-    @staticmethod
-    def checkIfKeyword(token_text):
-        for kind in TokenType:
-            # Relies on all keyword enum values being 1XX.
-            if kind.name == token_text and kind.value >= 100 and kind.value <= 200:
-                return kind
-        return None
-
 
 class Lexer:
-    def __init__(self, source: str) -> None:
-        self.source = source + '\n' # Source code to lex as a string. Append a newline to simplify lexing/parsing the last token/statement.
-        self.cur_char = '' # Current character in the string
-        self.cur_pos = -1 # Current position in the string
-        self.next_char()
-
-    # process the next character
-    def next_char(self):
-        self.cur_pos += 1
-        if self.cur_pos >= len(self.source):
-            self.cur_char = '\0' # EOF
-        else:
-            self.cur_char = self.source[self.cur_pos]
-
-    # return the lookahead character
-    def peek(self):
-        if self.cur_pos + 1 >= len(self.source):
-            return '\0' # EOF
-        return self.source[self.cur_pos + 1]
+    __slots__ = ('source', 'stream')
+
+    def __init__(self, source: bytes) -> None:
+        # Source code to lex as bytes. Append a newline to simplify lexing/parsing the last token/statement.
+        # The file is read in binary mode, so translate CRLF and CR line endings to '\n' here like text mode would.
+        self.source = source.replace(b'\r\n', b'\n').replace(b'\r', b'\n') + b'\n'
+        self.stream = self.scan() # Tokens not handed out yet.
 
     # invalid token found, print error message and abort
     def abort(self, message:str) -> str:
         sys.exit(f'Lexing error: {message}')
 
-    # skip whitespace except newlines, which we will use to indicate the end of a statement.
-    def skip_whitespace(self):
-        while self.cur_char == ' ' or self.cur_char == '\t' or self.cur_char == '\r':
-            self.next_char()
-
-    # skip comments in the code
-    def skip_comment(self):
-        if self.cur_char == '#':
-            while self.cur_char != '\n':
-                self.next_char()
+    # yield every token in the source, in a single pass over the regex matches, stopping before EOF
+    def scan(self):
+        # Bind everything used per match to locals, this loop runs once per token.
+        fixed_tokens = FIXED_TOKENS
+        intern = sys.intern
+        IDENT, NUMBER, STRING = TokenType.IDENT, TokenType.NUMBER, TokenType.STRING
+
+        for match in TOKEN_RE.finditer(self.source):
+            raw = match.group(match.lastindex) # The token itself, without the whitespace before it.
+            # Most tokens are decided by a single lookup on their bytes.
+            fixed = fixed_tokens.get(raw)
+            if fixed is not None:
+                yield Token(fixed[0], fixed[1])                            # New line, operator or keyword token
+                continue
+
+            group = match.lastgroup
+            if group == 'IDENT':
+                # Interned, so repeated names share one string and symbol/label set lookups hit on identity.
+                yield Token(intern(raw.decode('ascii')), IDENT)            # Identifier token
+            elif group == 'NUMBER':
+                yield Token(intern(raw.decode('ascii')), NUMBER)           # Number token
+            elif group == 'STRING':
+                try:
+                    text = raw[1:-1].decode('utf-8')
+                except UnicodeDecodeError:
+                    self.abort('Illegal characters in string')
+                yield Token(text, STRING)                                  # String token, without the quotes
+            elif group == 'BADNUMBER':
+                self.abort('Illegal characters in number')
+            elif group == 'BADSTRING':
+                self.abort('Illegal characters in string')
+            elif group == 'OPENSTRING':
+                self.abort('Unterminated string')
+            elif group == 'BADOP':
+                next_char = self.source[match.end():match.end() + 1].decode('utf-8', 'replace')
+                self.abort(f'Expected != got !{next_char}')
+            else:
+                # Unknown token
+                self.abort(f"Unknown token {raw.decode('utf-8', 'replace')}")
 
     # return the next token
     def get_token(self):
-        self.skip_whitespace()
-        self.skip_comment()
-        token = None
-        # Check the first character of this token to see if we can decide what it is.
-        # If it is a multiple character operator (e.g., !=), number, identifier, or keyword then we will process the rest.
-        
-        if self.cur_char == '+':
-            token = Token(self.cur_char, TokenType.PLUS)                   # Plus token.
-        elif self.cur_char == '-':
-            token = Token(self.cur_char, TokenType.MINUS)                  # Minus token.
-        elif self.cur_char == '*':
-            token = Token(self.cur_char, TokenType.ASTERISK)               # Asterik token.
-        elif self.cur_char == '/':
-            token = Token(self.cur_char, TokenType.SLASH)                  # Slash token.
-        elif self.cur_char == '\n':
-            token = Token(self.cur_char, TokenType.NEWLINE)                # New line token
-        elif self.cur_char == '=':
-            if self.peek() == '=':
-                last_char = self.cur_char
-                self.next_char()
-                token = Token(last_char + self.cur_char, TokenType.EQEQ)    # Double eQuals token
-            else:
-                token = Token(self.cur_char, TokenType.EQ)                  # eQuals token
-        elif self.cur_char == '>':
-            if self.peek() == '=':
-                last_char = self.cur_char
-                self.next_char()
-                token = Token(last_char + self.cur_char, TokenType.GTEQ)    # Greater than eQual token
-            else:
-                token = Token(self.cur_char, TokenType.GT)                  # Greater than token
-        elif self.cur_char == '<':
-            if self.peek() == '=':
-                last_char = self.cur_char
-                self.next_char()
-                token = Token(last_char + self.cur_char, TokenType.LTEQ)    # Less than eQual token
-            else:
-                token = Token(self.cur_char, TokenType.LT)                  # Less than token
-        elif self.cur_char == '!':
-            if self.peek() == '=':
-                last_char = self.cur_char
-                self.next_char()
-                token = Token(last_char + self.cur_char, TokenType.NOTEQ)   # Not eQual to token
-            else:
-                self.abort(f'Expected != got !{self.peek()}')
-        elif self.cur_char == '\"':
-            self.next_char()
-            start_pos = self.cur_pos
-
-            while self.cur_char != '\"':
-                if self.cur_char == '\r' or self.cur_char == '\t' or self.cur_char == '\\' or self.cur_char == '%':
-                    self.abort('Illegal characters in string')
-                self.next_char()
-            tok_text = self.source[start_pos:self.cur_pos]
-            token = Token(tok_text, TokenType.STRING)                       # String token
-        elif self.cur_char.isdigit():
-            # Leading character is a digit, so this must be a number.
-            # Get all consecutive digits and decimal if there is one.
-            start_pos = self.cur_pos
-            
-            while self.peek().isdigit():
-                self.next_char()
-            if self.peek() == '.': # Decimal!
-                self.next_char()
-                # Must have at least one digit after decimal.
-                if not self.peek().isdigit():
-                    self.abort('Illegal characters in number')
-                while self.peek().isdigit():
-                    self.next_char() 
-            tok_num = self.source[start_pos:self.cur_pos + 1] # Get the substring.
-            token = Token(tok_num, TokenType.NUMBER)                       # Number token
-        elif self.cur_char.isalpha():
-            # Leading character is a letter, so this must be an identifier or a keyword.
-            # Get all consecutive alpha numeric characters.
-            start_pos = self.cur_pos
-            while self.peek().isalnum():
-                self.next_char()
-            # Check if the token is in the list of keywords.
-            tok_text = self.source[start_pos:self.cur_pos + 1] # Get the substring
-            keyword = Token.checkIfKeyword(tok_text)
-
-            if keyword == None: # Identifier
-                token = Token(tok_text, TokenType.IDENT)                   # Identifier token
-            else:
-                token = Token(tok_text, keyword)                           # Keyword token
-
-        elif self.cur_char == '\0':
-            token = Token(self.cur_char, TokenType.EOF)                    # EOF token
-        else:
-            # Unknown token
-            self.abort(f'Unknown token {self.cur_char}')
-        self.next_char()
+        token = next(self.stream, None)
+        if token is None:
+            return Token('\0', TokenType.EOF)                             # EOF token
         return token
+
+    # return every token in the source, ending with the EOF token
+    def tokenize(self):
+        tokens = list(self.stream)
+        tokens.append(Token('\0', TokenType.EOF))                         # EOF token
+        return tokens
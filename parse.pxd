@@ -0,0 +1,13 @@
+# C-level declarations for the optional Cython build (see setup.py); parse.py itself stays plain Python.
+# The parser's attributes become typed struct fields and its per-token helpers become C-callable methods.
+cdef class Parser:
+    cdef public object lexer, emitter
+    cdef public set symbols, labelsDeclared, labelsGotoed
+    cdef public list tokens
+    cdef public Py_ssize_t token_index
+    cdef public object cur_token, peek_token
+
+    cpdef bint check_token(self, kind)
+    cpdef bint check_peek(self, kind)
+    cpdef match(self, kind)
+    cpdef next_token(self)
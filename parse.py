@@ -3,8 +3,14 @@ from lex import *
 from emit import *
 
 
+# Token kinds accepted as a comparison operator.
+_CMP_OPS = frozenset({TokenType.GT, TokenType.GTEQ, TokenType.LT, TokenType.LTEQ, TokenType.EQEQ, TokenType.NOTEQ})
+
+
 # Parser object keeps track of current token and checks if the code matches the grammar.
 class Parser:
+    __slots__ = ('lexer', 'emitter', 'symbols', 'labelsDeclared', 'labelsGotoed', 'tokens', 'token_index', 'cur_token', 'peek_token')
+
     def __init__(self, lexer: Lexer, emitter: Emitter) -> None:
         self.lexer = lexer
         self.emitter = emitter
@@ -13,10 +19,11 @@ class Parser:
         self.labelsDeclared = set() # Labels declared so far.
         self.labelsGotoed = set()
 
-        self.cur_token = None
-        self.peek_token = None
-        self.next_token()
-        self.next_token() # Call this twice to initialize current and peek
+        self.tokens = lexer.tokenize() # All tokens up front, ending with EOF.
+        self.tokens.append(self.tokens[-1]) # Repeat EOF so peeking past the last token stays in range.
+        self.token_index = 0
+        self.cur_token = self.tokens[0]
+        self.peek_token = self.tokens[1]
 
     # Return true if the current token matches.
     def check_token(self, kind: TokenType) -> bool:
@@ -34,8 +41,9 @@ class Parser:
 
     # Advances the current token.
     def next_token(self):
+        self.token_index += 1
         self.cur_token = self.peek_token
-        self.peek_token = self.lexer.get_token()
+        self.peek_token = self.tokens[self.token_index + 1]
 
     def abort(self, message):
         sys.exit(f'Error Parsing: {message}')
@@ -55,166 +63,192 @@ class Parser:
         self.emitter.emit_line('return 0;')
         self.emitter.emit_line('}')
         # Check that each label referenced in a GOTO is declared.
-        for label in self.labelsGotoed:
-            if label not in self.labelsDeclared:
-                self.abort(f'Attempting to go to undeclared label: {label}')
+        missing = self.labelsGotoed - self.labelsDeclared
+        if missing:
+            noun = 'labels' if len(missing) > 1 else 'label'
+            self.abort(f"Attempting to go to undeclared {noun}: {', '.join(sorted(missing))}")
 
     def statement(self):
-        # "PRINT" (expression | string)
-        if self.check_token(TokenType.PRINT):
-            self.next_token()
+        # Look up the statement by its leading keyword.
+        handler = self._STMT_HANDLERS.get(self.cur_token.kind)
+        if handler is None:
+            # This is not a valid statement. Error!
+            self.abort(f'Invalid statement at {self.cur_token.text} ({self.cur_token.kind.name})')
+        handler(self)
 
-            if self.check_token(TokenType.STRING):
-                # Simple string, so print it.
-                self.emitter.emit_line("printf(\"" + self.cur_token.text + "\\n\");")
-                self.next_token()
-            else:
-                # Expect an expression and print the result as a float.
-                self.emitter.emit("printf(\"%" + ".2f\\n\", (float)(")
-                self.expression()
-                self.emitter.emit_line('));')
-        # "IF" comparison "THEN" { statements } "ENDIF"
-        elif self.check_token(TokenType.IF):
-            self.next_token()
-            self.emitter.emit('if(')
-            self.comparison()
-
-            self.match(TokenType.THEN)
-            self.nl()
-            self.emitter.emit('){')
-            # Zero or more statements in the body
-            while not self.check_token(TokenType.ENDIF):
-                self.statement()
-            self.match(TokenType.ENDIF)
-            self.emitter.emit_line('}')
-        # "WHILE" comparison "REPEAT" { statement } "ENDWHILE"
-        elif self.check_token(TokenType.WHILE):
-            self.next_token()
-            self.emitter.emit('while(')
-            self.comparison()
-
-            self.match(TokenType.REPEAT)
-            self.nl()
-            self.emitter.emit('){')
-            # Zero or more statements in the loop body.
-            while not self.check_token(TokenType.ENDWHILE):
-                self.statement()
-
-            self.match(TokenType.ENDWHILE)
-            self.emitter.emit('}')
-        # "LABEL" ident
-        elif self.check_token(TokenType.LABEL):
-            self.next_token()
-            # Make sure this label doesn't already exist.
-            if self.cur_token.text in self.labelsDeclared:
-                self.abort(f'Label already exists: {self.cur_token.text}')
-            self.labelsDeclared.add(self.cur_token.text)
-            self.emitter.emit(f'{self.cur_token.text}:')
-            self.match(TokenType.IDENT)
-
-        # "GOTO" ident
-        elif self.check_token(TokenType.GOTO):
-            self.next_token()
-            self.labelsGotoed.add(self.cur_token.text)
-            self.emitter.emit_line(f'goto {self.cur_token.text};')
-            self.match(TokenType.IDENT)
+        # newline
+        self.nl()
 
-        # "LET" ident "=" expression
-        elif self.check_token(TokenType.LET):
-            self.next_token()
-            #  Check if ident exists in symbol table. If not, declare it.
-            if self.cur_token.text not in self.symbols:
-                self.symbols.add(self.cur_token.text)
-                self.emitter.header_line(f'float {self.cur_token.text};')
-            self.emitter.emit(f'{self.cur_token.text} = ')
-            self.match(TokenType.IDENT)
-            self.match(TokenType.EQ)
-            self.expression()
-            self.emitter.emit_line(';')
-        # "INPUT" ident
-        elif self.check_token(TokenType.INPUT):
+    # "PRINT" (expression | string)
+    def _stmt_print(self):
+        self.next_token()
+
+        if self.check_token(TokenType.STRING):
+            # Simple string, so print it.
+            self.emitter.emit_many('printf("', self.cur_token.text, '\\n");\n')
             self.next_token()
-            #If variable doesn't already exist, declare it.
-            if self.cur_token.text not in self.symbols:
-                self.symbols.add(self.cur_token.text)
-                self.emitter.header_line(f'float {self.cur_token.text};')
-
-            # Emit scanf but also validate the input. If invalid, set the variable to 0 and clear the input.
-            self.emitter.emit_line(f'if(0 == scanf("%f", &{self.cur_token.text}))' + '{')
-            self.emitter.emit_line(f'{self.cur_token.text} = 0;')
-            self.emitter.emit('scanf("%')
-            self.emitter.emit_line('*s");')
-            self.emitter.emit_line('}')
-            self.match(TokenType.IDENT)
-
-        # This is not a valid statement. Error!
         else:
-            self.abort(f'Invalid statement at {self.cur_token.text} ({self.cur_token.kind.name})')
+            # Expect an expression and print the result as a float.
+            self.emitter.emit("printf(\"%" + ".2f\\n\", (float)(")
+            self.emitter.emit(' '.join(self.expression()))
+            self.emitter.emit_line('));')
 
-        # newline
+    # "IF" comparison "THEN" { statements } "ENDIF"
+    def _stmt_if(self):
+        self.next_token()
+        self.emitter.emit('if(')
+        self.emitter.emit(' '.join(self.comparison()))
+
+        self.match(TokenType.THEN)
         self.nl()
+        self.emitter.emit('){')
+        # Zero or more statements in the body
+        while not self.check_token(TokenType.ENDIF):
+            self.statement()
+        self.match(TokenType.ENDIF)
+        self.emitter.emit_line('}')
+
+    # "WHILE" comparison "REPEAT" { statement } "ENDWHILE"
+    def _stmt_while(self):
+        self.next_token()
+        self.emitter.emit('while(')
+        self.emitter.emit(' '.join(self.comparison()))
+
+        self.match(TokenType.REPEAT)
+        self.nl()
+        self.emitter.emit('){')
+        # Zero or more statements in the loop body.
+        while not self.check_token(TokenType.ENDWHILE):
+            self.statement()
+
+        self.match(TokenType.ENDWHILE)
+        self.emitter.emit('}')
+
+    # "LABEL" ident
+    def _stmt_label(self):
+        self.next_token()
+        # Make sure this label doesn't already exist.
+        if self.cur_token.text in self.labelsDeclared:
+            self.abort(f'Label already exists: {self.cur_token.text}')
+        self.labelsDeclared.add(self.cur_token.text)
+        self.emitter.emit_many(self.cur_token.text, ':')
+        self.match(TokenType.IDENT)
+
+    # "GOTO" ident
+    def _stmt_goto(self):
+        self.next_token()
+        self.labelsGotoed.add(self.cur_token.text)
+        self.emitter.emit_many('goto ', self.cur_token.text, ';\n')
+        self.match(TokenType.IDENT)
+
+    # "LET" ident "=" expression
+    def _stmt_let(self):
+        self.next_token()
+        #  Check if ident exists in symbol table. If not, declare it.
+        if self.cur_token.text not in self.symbols:
+            self.symbols.add(self.cur_token.text)
+            self.emitter.header_line(f'float {self.cur_token.text};')
+        self.emitter.emit_many(self.cur_token.text, ' = ')
+        self.match(TokenType.IDENT)
+        self.match(TokenType.EQ)
+        self.emitter.emit(' '.join(self.expression()))
+        self.emitter.emit_line(';')
+
+    # "INPUT" ident
+    def _stmt_input(self):
+        self.next_token()
+        #If variable doesn't already exist, declare it.
+        if self.cur_token.text not in self.symbols:
+            self.symbols.add(self.cur_token.text)
+            self.emitter.header_line(f'float {self.cur_token.text};')
+
+        # Emit scanf but also validate the input. If invalid, set the variable to 0 and clear the input.
+        self.emitter.emit_many('if(0 == scanf("%f", &', self.cur_token.text, ')){\n')
+        self.emitter.emit_many(self.cur_token.text, ' = 0;\n')
+        self.emitter.emit('scanf("%')
+        self.emitter.emit_line('*s");')
+        self.emitter.emit_line('}')
+        self.match(TokenType.IDENT)
+
+    # Leading keyword -> statement handler, used by statement() instead of a chain of checks.
+    _STMT_HANDLERS = {
+        TokenType.PRINT: _stmt_print,
+        TokenType.IF: _stmt_if,
+        TokenType.WHILE: _stmt_while,
+        TokenType.LABEL: _stmt_label,
+        TokenType.GOTO: _stmt_goto,
+        TokenType.LET: _stmt_let,
+        TokenType.INPUT: _stmt_input,
+    }
 
     # comparison ::= expression (("==" | "!=" | ">" | ">=" | "<" | "<=") expression)+
+    # Like the expression rules below, returns the C tokens of the comparison instead of emitting them.
     def comparison(self):
-        self.expression()
+        parts = self.expression()
         # Must be at least one comparison operator and another expression
-        if self.isComparisonOperator():
-            self.emitter.emit(self.cur_token.text)
+        if self.cur_token.kind in _CMP_OPS:
+            parts.append(self.cur_token.text)
             self.next_token()
-            self.expression()
+            parts += self.expression()
         else:
             self.abort(f'Expected comparison operator at {self.cur_token.text}')
 
         # Can have 0 or more comparison operator and expressions.
-        while self.isComparisonOperator():
-            self.emitter.emit(self.cur_token.text)
+        while self.cur_token.kind in _CMP_OPS:
+            parts.append(self.cur_token.text)
             self.next_token()
-            self.expression()
-        
-    # Return true if the current token is a comparison operator.
-    def isComparisonOperator(self) -> bool:
-        return self.check_token(TokenType.GT) or self.check_token(TokenType.GTEQ) or self.check_token(TokenType.LT) or self.check_token(TokenType.LTEQ) or self.check_token(TokenType.EQEQ) or self.check_token(TokenType.NOTEQ)
+            parts += self.expression()
+        return parts
 
     # expression ::= term {( "-" | "+" ) term}
-    def expression(self):
-        self.term()
+    def expression(self, _PLUS=TokenType.PLUS, _MINUS=TokenType.MINUS):
+        ct = self.check_token
+        parts = self.term()
         # Can have 0 or more +/- and expressions.
-        while self.check_token(TokenType.PLUS) or self.check_token(TokenType.MINUS):
-            self.emitter.emit(self.cur_token.text)
+        while ct(_PLUS) or ct(_MINUS):
+            parts.append(self.cur_token.text)
             self.next_token()
-            self.term()
+            parts += self.term()
+        return parts
 
     # term ::= unary {( "/" | "*" ) unary}
-    def term(self): 
-       self.unary()
-       # Can have 0 or more *// and expressions.
-       while self.check_token(TokenType.ASTERISK) or self.check_token(TokenType.SLASH):
-           self.emitter.emit(self.cur_token.text)
-           self.next_token()
-           self.unary()
+    def term(self, _ASTERISK=TokenType.ASTERISK, _SLASH=TokenType.SLASH):
+        ct = self.check_token
+        parts = self.unary()
+        # Can have 0 or more *// and expressions.
+        while ct(_ASTERISK) or ct(_SLASH):
+            parts.append(self.cur_token.text)
+            self.next_token()
+            parts += self.unary()
+        return parts
 
     # unary ::= ["+" | "-"] primary
-    def unary(self):
+    def unary(self, _PLUS=TokenType.PLUS, _MINUS=TokenType.MINUS):
+        ct = self.check_token
+        parts = []
         # Optional unary +/-
-        if self.check_token(TokenType.PLUS) or self.check_token(TokenType.MINUS):
-            self.emitter.emit(self.cur_token.text)
+        if ct(_PLUS) or ct(_MINUS):
+            parts.append(self.cur_token.text)
             self.next_token()
-        self.primary()
+        parts.append(self.primary())
+        return parts
 
     # primary ::= number | ident
-    def primary(self):
-        if self.check_token(TokenType.NUMBER):
-            self.emitter.emit(self.cur_token.text)
+    # Returns the text of the single token.
+    def primary(self, _NUMBER=TokenType.NUMBER, _IDENT=TokenType.IDENT):
+        ct = self.check_token
+        text = self.cur_token.text
+        if ct(_NUMBER):
             self.next_token()
-        elif self.check_token(TokenType.IDENT):
+        elif ct(_IDENT):
             # Ensure the variable already exists.
-            if self.cur_token.text not in self.symbols:
-                self.abort(f'Referencing variable before assignment: {self.cur_token.text}')
-            self.emitter.emit(self.cur_token.text)
+            if text not in self.symbols:
+                self.abort(f'Referencing variable before assignment: {text}')
             self.next_token()
         else:
             # Error!
-            self.abort(f'Unexpected token at {self.cur_token.text}')
+            self.abort(f'Unexpected token at {text}')
+        return text
 
     # nl ::= '\n'+
     def nl(self):
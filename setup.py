@@ -0,0 +1,24 @@
+# Optional build step that compiles the lexer, parser and emitter to C extensions with Cython.
+# The modules stay plain Python, so cosmos.py works the same with or without it; the parser's
+# C types are declared next to it in parse.pxd.
+#   python setup.py build_ext --inplace
+import platform
+from setuptools import setup
+
+
+ext_modules = []
+# Under PyPy the JIT runs the plain modules faster than it would run C extensions, so only cythonize on CPython.
+if platform.python_implementation() == 'CPython':
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        pass # No Cython, install the plain modules.
+    else:
+        ext_modules = cythonize(['lex.py', 'parse.py', 'emit.py'], language_level=3)
+
+
+setup(
+    name='cosmos-code-compiler',
+    py_modules=['lex', 'parse', 'emit'],
+    ext_modules=ext_modules,
+)